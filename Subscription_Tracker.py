@@ -1,9 +1,27 @@
 import customtkinter as ctk
-from datetime import datetime
+import tkinter as tk
+from tkinter import filedialog, messagebox
+from datetime import datetime, date, timedelta
+import argparse
+import bisect
+import csv
 import json
+import math
 import os
-from dataclasses import dataclass, asdict
+import re
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict, replace
+from functools import partial
 import calendar
+import shutil
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
 
 # Настройка темы
 ctk.set_appearance_mode("dark")
@@ -11,6 +29,94 @@ ctk.set_default_color_theme("blue")
 
 # Путь к файлу данных
 DATA_FILE = "subscriptions.json"
+# Версия формата файла данных; более старые файлы мигрируются при загрузке
+SCHEMA_VERSION = 2
+# Записи, которые не удалось загрузить, вместе с причинами
+QUARANTINE_FILE = "subscriptions.quarantine.json"
+# Локальная таблица курсов валют и валюта отображения
+RATES_FILE = "rates.json"
+# Рекомендательная блокировка для совместной записи несколькими процессами
+LOCK_FILE = DATA_FILE + ".lock"
+
+# Интервалы опроса файла данных (мс): пока файл не меняется, интервал удваивается
+WATCH_MIN_INTERVAL = 1000
+WATCH_MAX_INTERVAL = 16000
+
+# Глубина истории отмены
+HISTORY_LIMIT = 100
+
+# Аналитика: сколько месяцев показывать в динамике и дней в календаре платежей
+TREND_MONTHS = 12
+CALENDAR_DAYS = 35
+
+# Валюты: курсы задаются как стоимость единицы валюты в базовой валюте
+BASE_CURRENCY = "RUB"
+CURRENCY_SYMBOLS = {"RUB": "₽", "USD": "$", "EUR": "€"}
+DEFAULT_RATES = {"RUB": 1.0, "USD": 90.0, "EUR": 100.0}
+
+# Значения по умолчанию для необязательных полей записи
+DEFAULT_COLOR = "#6B7280"
+DEFAULT_ICON = "📦"
+HEX_COLOR = re.compile(r"#[0-9A-Fa-f]{6}")
+# Запятая считается десятичной, только если за ней 1–2 цифры («199,99»); «1,490» неоднозначно
+DECIMAL_COMMA = re.compile(r"[+-]?\d+,\d{1,2}")
+
+# Порог сходства названий (коэффициент Дайса по триграммам)
+PRESET_THRESHOLD = 0.5
+DUPLICATE_THRESHOLD = 0.6
+
+# Транслитерация, чтобы «Кинопоиск» и «Kinopoisk» считались одним названием
+TRANSLIT = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e", "ж": "zh",
+    "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o",
+    "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "h", "ц": "ts",
+    "ч": "ch", "ш": "sh", "щ": "sch", "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "yu",
+    "я": "ya", "x": "ks",
+})
+
+
+@contextmanager
+def file_lock(path, blocking=True):
+    """Эксклюзивная блокировка lock-файла; отдаёт True, если блокировка получена"""
+    with open(path, "a+b") as lock:
+        acquired = True
+        try:
+            if sys.platform == "win32":
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except OSError:
+            if blocking:
+                raise
+            acquired = False
+
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                if sys.platform == "win32":
+                    lock.seek(0)
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+def file_signature(path):
+    """Отпечаток файла (время изменения, размер) или None, если файла нет"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def diff_records(old: dict, new: dict):
+    """Сравнить два состояния {id: запись} -> (добавленные, изменённые, удалённые id)"""
+    added = [new[i] for i in new.keys() - old.keys()]
+    changed = [rec for i, rec in new.items() if i in old and old[i] != rec]
+    removed = list(old.keys() - new.keys())
+    return added, changed, removed
 
 
 @dataclass
@@ -23,6 +129,7 @@ class Subscription:
     category: str
     color: str
     icon: str
+    currency: str = BASE_CURRENCY
 
     def days_until_payment(self) -> int:
         """Рассчитать дни до следующего платежа"""
@@ -49,6 +156,408 @@ class Subscription:
 
         return (next_payment - today).days + 1
 
+    def payment_dates(self, start: date, days: int):
+        """Даты списаний в интервале [start, start + days)"""
+        end = start + timedelta(days=days)
+        year, month = start.year, start.month
+        while True:
+            day = min(self.billing_day, calendar.monthrange(year, month)[1])
+            payment = date(year, month, day)
+            if payment >= end:
+                return
+            if payment >= start:
+                yield payment
+            month += 1
+            if month > 12:
+                month = 1
+                year += 1
+
+
+def _to_number(value):
+    """Число из числа или строки вида «199», «199,99 ₽»; иначе None"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    elif isinstance(value, str):
+        text = value.strip().replace(" ", "").replace("\u00a0", "").rstrip("₽$€")
+        if "," in text:
+            if not DECIMAL_COMMA.fullmatch(text):
+                return None
+            text = text.replace(",", ".")
+        try:
+            number = float(text)
+        except ValueError:
+            return None
+    else:
+        return None
+    return number if math.isfinite(number) else None
+
+
+def coerce_record(record):
+    """Проверить и привести одну запись -> (поля подписки, None) или (None, причина).
+
+    Id может оказаться None: такой записи выдаётся новый id.
+    """
+    if not isinstance(record, dict):
+        return None, "запись не является объектом"
+
+    name = record.get("name")
+    if not isinstance(name, str) or not name.strip():
+        return None, "нет названия"
+
+    price = _to_number(record.get("price"))
+    if price is None or price <= 0:
+        return None, f"некорректная цена: {record.get('price')!r}"
+
+    day = _to_number(record.get("billing_day"))
+    if day is None or not day.is_integer() or not 1 <= day <= 31:
+        return None, f"некорректный день списания: {record.get('billing_day')!r}"
+
+    currency = record.get("currency", BASE_CURRENCY)
+    currency = currency.strip().upper() if isinstance(currency, str) else currency
+    if currency not in CURRENCY_SYMBOLS:
+        return None, f"неизвестная валюта: {record.get('currency')!r}"
+
+    sub_id = _to_number(record.get("id"))
+    category = record.get("category")
+    color = record.get("color")
+    icon = record.get("icon")
+
+    return {
+        "id": int(sub_id) if sub_id is not None and sub_id.is_integer() and sub_id > 0 else None,
+        "name": name.strip(),
+        "price": price,
+        "billing_day": int(day),
+        "category": category.strip() if isinstance(category, str) and category.strip() else "Другое",
+        "color": color if isinstance(color, str) and HEX_COLOR.fullmatch(color) else DEFAULT_COLOR,
+        "icon": icon if isinstance(icon, str) and icon.strip() else DEFAULT_ICON,
+        "currency": currency,
+    }, None
+
+
+def validate_records(records, next_id: int = 1):
+    """Проверить записи одним проходом -> (подписки, отбракованные [(запись, причина)]).
+
+    Новые id выдаются не меньше next_id, чтобы не повторить id удалённых подписок.
+    """
+    if not isinstance(records, list):
+        return [], [(records, "поле subscriptions не является списком")]
+
+    valid = []
+    quarantined = []
+    without_id = []
+    seen = set()
+    for record in records:
+        fields, reason = coerce_record(record)
+        if fields is None:
+            quarantined.append((record, reason))
+        elif fields["id"] is None or fields["id"] in seen:
+            without_id.append(fields)
+        else:
+            seen.add(fields["id"])
+            valid.append(fields)
+
+    # Записям без id или с повторным id выдаём новые
+    next_id = max(next_id, max(seen, default=0) + 1)
+    for fields in without_id:
+        fields["id"] = next_id
+        next_id += 1
+        valid.append(fields)
+
+    return [Subscription(**fields) for fields in valid], quarantined
+
+
+def _migrate_v1(data):
+    """v1 -> v2: у подписок появилась валюта, до этого все цены были в рублях"""
+    records = data.get("subscriptions")
+    if isinstance(records, list):
+        for record in records:
+            if isinstance(record, dict):
+                record.setdefault("currency", BASE_CURRENCY)
+    return data
+
+
+# Версия схемы -> функция, переводящая данные на следующую версию
+MIGRATIONS = {1: _migrate_v1}
+
+
+class SchemaVersionError(ValueError):
+    """Файл данных записан более новой версией приложения"""
+
+
+def migrate_data(data: dict) -> dict:
+    """Привести содержимое файла к текущей версии схемы"""
+    version = data.get("version", 1)
+    if not isinstance(version, int) or version < 1:
+        version = 1
+    if version > SCHEMA_VERSION:
+        # Понижать версию нельзя: старая схема потеряет неизвестные ей поля
+        raise SchemaVersionError(
+            f"файл создан более новой версией приложения (версия схемы {version}, "
+            f"поддерживается {SCHEMA_VERSION})"
+        )
+    while version < SCHEMA_VERSION:
+        data = MIGRATIONS[version](data)
+        version += 1
+    data["version"] = version
+    return data
+
+
+@dataclass
+class LoadedData:
+    """Результат чтения файла данных"""
+    subscriptions: list
+    quarantined: list
+    next_id: int
+    history: dict
+
+
+def load_data_file(path) -> LoadedData:
+    """Прочитать файл данных с миграцией схемы и проверкой каждой записи.
+
+    Некорректные записи не мешают загрузке остальных и возвращаются отдельно.
+    OSError и ValueError означают, что файл не читается целиком.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("ожидался JSON-объект")
+
+    data = migrate_data(data)
+
+    next_id = _to_number(data.get("next_id"))
+    next_id = int(next_id) if next_id is not None and next_id.is_integer() else 1
+    subscriptions, quarantined = validate_records(data.get("subscriptions", []), next_id)
+    next_id = max(next_id, max((s.id for s in subscriptions), default=0) + 1)
+
+    history = data.get("history")
+    history = {
+        month: _to_number(total) for month, total in history.items()
+        if isinstance(month, str) and _to_number(total) is not None
+    } if isinstance(history, dict) else {}
+
+    return LoadedData(subscriptions, quarantined, next_id, history)
+
+
+def quarantine_records(quarantined, path=QUARANTINE_FILE):
+    """Дописать отбракованные записи с причинами в отдельный файл, без повторов"""
+    entries = []
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = []
+        if not isinstance(entries, list):
+            entries = []
+
+    known = {json.dumps(e.get("record"), sort_keys=True) for e in entries if isinstance(e, dict)}
+    stamp = datetime.now().isoformat(timespec="seconds")
+    for record, reason in quarantined:
+        key = json.dumps(record, sort_keys=True)
+        if key not in known:
+            known.add(key)
+            entries.append({"record": record, "reason": reason, "time": stamp})
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entries, f, ensure_ascii=False, indent=2)
+
+
+def format_input_number(value: float) -> str:
+    """Число для поля ввода без потери точности (формат :g оставляет 6 значащих цифр)"""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def format_money(amount: float, currency: str) -> str:
+    """Сумма с символом валюты; копейки/центы показываются только для нецелых сумм"""
+    digits = 0 if float(amount).is_integer() else 2
+    return f"{amount:,.{digits}f}{CURRENCY_SYMBOLS.get(currency, currency)}"
+
+
+def clean_rates(rates) -> dict:
+    """Оставить из таблицы курсов только известные валюты с положительным конечным курсом"""
+    if not isinstance(rates, dict):
+        return {}
+    return {
+        currency: float(rate) for currency, rate in rates.items()
+        if currency in CURRENCY_SYMBOLS
+        and isinstance(rate, (int, float)) and not isinstance(rate, bool)
+        and math.isfinite(rate) and rate > 0
+    }
+
+
+def clean_display_currency(currency) -> str:
+    return currency if isinstance(currency, str) and currency in CURRENCY_SYMBOLS else BASE_CURRENCY
+
+
+class CurrencyConverter:
+    """Пересчёт цен в валюту отображения по локальной таблице курсов.
+
+    Пересчитанные цены кэшируются по id подписки вместе с ценой и валютой,
+    из которых получены: смена цены обнаруживается по ключу, а весь кэш
+    сбрасывается только при смене курсов или валюты отображения.
+    """
+
+    def __init__(self, rates=None, display=BASE_CURRENCY):
+        # Некорректные курсы из редактируемого вручную файла заменяются значениями по умолчанию
+        self.rates = dict(DEFAULT_RATES)
+        self.rates.update(clean_rates(rates))
+        self.display = clean_display_currency(display)
+        self._cache = {}
+
+    def factor(self, currency: str) -> float:
+        return self.rates.get(currency, 1.0) / self.rates[self.display]
+
+    def convert(self, sub) -> float:
+        entry = self._cache.get(sub.id)
+        if entry is None or entry[0] != sub.price or entry[1] != sub.currency:
+            entry = (sub.price, sub.currency, sub.price * self.factor(sub.currency))
+            self._cache[sub.id] = entry
+        return entry[2]
+
+    def convert_all(self, subscriptions) -> dict:
+        """Пересчитать подписки одним проходом -> {id: цена в валюте отображения}"""
+        factors = {}
+        result = {}
+        for sub in subscriptions:
+            entry = self._cache.get(sub.id)
+            if entry is None or entry[0] != sub.price or entry[1] != sub.currency:
+                factor = factors.get(sub.currency)
+                if factor is None:
+                    factor = factors[sub.currency] = self.factor(sub.currency)
+                entry = (sub.price, sub.currency, sub.price * factor)
+                self._cache[sub.id] = entry
+            result[sub.id] = entry[2]
+        return result
+
+    def forget(self, sub_id):
+        self._cache.pop(sub_id, None)
+
+    def to_base(self, amount: float) -> float:
+        return amount * self.rates[self.display]
+
+    def from_base(self, amount: float) -> float:
+        return amount / self.rates[self.display]
+
+    def set_rates(self, rates: dict):
+        self.rates.update(clean_rates(rates))
+        self._cache.clear()
+
+    def set_display(self, currency: str):
+        if currency in self.rates and currency != self.display:
+            self.display = currency
+            self._cache.clear()
+
+
+def normalize_name(name: str) -> str:
+    """Название без регистра, пунктуации и лишних пробелов, в латинице"""
+    return re.sub(r"[\W_]+", " ", name.lower().translate(TRANSLIT)).strip()
+
+
+class NameIndex:
+    """Индекс символьных триграмм для нечёткого поиска названий.
+
+    Поиск проходит только по спискам ключей, разделяющих триграммы с запросом,
+    поэтому не сравнивает запрос со всеми названиями подряд.
+    """
+
+    def __init__(self):
+        self.postings = {}  # триграмма -> множество ключей
+        self.grams = {}     # ключ -> множество триграмм
+
+    @staticmethod
+    def trigrams(name: str) -> set:
+        text = f" {normalize_name(name)} "
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def add(self, key, name: str):
+        self.remove(key)
+        grams = self.trigrams(name)
+        self.grams[key] = grams
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key):
+        for gram in self.grams.pop(key, ()):
+            keys = self.postings[gram]
+            keys.discard(key)
+            if not keys:
+                del self.postings[gram]
+
+    def search(self, name: str, threshold: float, exclude=None):
+        """Ключи, похожие на name, как список (сходство, ключ) по убыванию сходства"""
+        query = self.trigrams(name)
+        if not query:
+            return []
+
+        shared = {}
+        for gram in query:
+            for key in self.postings.get(gram, ()):
+                shared[key] = shared.get(key, 0) + 1
+
+        results = []
+        for key, count in shared.items():
+            if key == exclude:
+                continue
+            score = 2 * count / (len(query) + len(self.grams[key]))
+            if score >= threshold:
+                results.append((score, key))
+        results.sort(key=lambda x: -x[0])
+        return results
+
+    def best(self, name: str, threshold: float, exclude=None):
+        results = self.search(name, threshold, exclude)
+        return results[0][1] if results else None
+
+
+class SortedIndex:
+    """Список пар (ключ, id), поддерживаемый в порядке вставками и удалениями через bisect"""
+
+    def __init__(self, key_func):
+        self.key_func = key_func
+        self.items = []
+        self.keys = {}  # id -> ключ, под которым запись лежит в items
+
+    def rebuild(self, subscriptions):
+        self.keys = {s.id: self.key_func(s) for s in subscriptions}
+        self.items = sorted((key, sub_id) for sub_id, key in self.keys.items())
+
+    def add(self, sub):
+        key = self.key_func(sub)
+        self.keys[sub.id] = key
+        bisect.insort(self.items, (key, sub.id))
+
+    def remove(self, sub_id):
+        key = self.keys.pop(sub_id, None)
+        if key is not None:
+            del self.items[bisect.bisect_left(self.items, (key, sub_id))]
+
+    def position(self, sub_id) -> int:
+        return bisect.bisect_left(self.items, (self.keys[sub_id], sub_id))
+
+    def ids(self, reverse=False):
+        items = reversed(self.items) if reverse else self.items
+        return [sub_id for _, sub_id in items]
+
+
+def compute_aggregates(subscriptions, today: date = None, prices: dict = None):
+    """Агрегаты для графиков: траты по категориям и платежи по дням на CALENDAR_DAYS вперёд.
+
+    prices — пересчитанные цены {id: сумма}; без них берутся исходные цены подписок.
+    """
+    today = today or date.today()
+    by_category = {}
+    payments = {}
+    for s in subscriptions:
+        price = prices[s.id] if prices is not None else s.price
+        by_category[s.category] = by_category.get(s.category, 0) + price
+        for payment in s.payment_dates(today, CALENDAR_DAYS):
+            offset = (payment - today).days
+            payments[offset] = payments.get(offset, 0) + price
+    return {"today": today, "by_category": by_category, "calendar": payments}
+
 
 class SubscriptionCard(ctk.CTkFrame):
     """Карточка подписки"""
@@ -151,7 +660,7 @@ class SubscriptionCard(ctk.CTkFrame):
 
         price_label = ctk.CTkLabel(
             price_frame,
-            text=f"{subscription.price:,.0f}₽",
+            text=format_money(subscription.price, subscription.currency),
             font=ctk.CTkFont(size=22, weight="bold"),
             text_color="#4CAF50"
         )
@@ -216,13 +725,19 @@ class AddSubscriptionDialog(ctk.CTkToplevel):
     ICONS = ["🎬", "🎵", "🔴", "▶️", "🍎", "🎧", "🎥", "☁️", "✈️", "🤖", "📝", "📦", "💪", "📚", "🎮", "💼"]
     COLORS = ["#E50914", "#1DB954", "#FC3F1D", "#FF0000", "#FA2D48", "#0077FF", "#FF6600", "#3693F3", "#229ED9", "#10A37F", "#6B7280", "#9333EA"]
 
-    def __init__(self, parent, subscription=None, on_save=None):
+    _preset_index = None
+
+    def __init__(self, parent, subscription=None, on_save=None, find_duplicate=None):
         super().__init__(parent)
 
         self.subscription = subscription
         self.on_save = on_save
+        self.find_duplicate = find_duplicate
+        self.suggested_preset = None
+        self.confirmed_duplicate = None
         self.selected_icon = "📦"
         self.selected_color = "#6B7280"
+        self.selected_currency = BASE_CURRENCY
 
         self.title("✏️ Редактировать" if subscription else "➕ Новая подписка")
         self.geometry("520x800")
@@ -347,11 +862,34 @@ class AddSubscriptionDialog(ctk.CTkToplevel):
             corner_radius=10
         )
         self.name_entry.pack(fill="x", padx=20)
+        self.name_entry.bind("<KeyRelease>", self._on_name_changed)
+
+        # Подсказка пресета по мере ввода и предупреждение о дубликате (скрыты по умолчанию)
+        self.suggestion_btn = ctk.CTkButton(
+            form_frame,
+            text="",
+            height=30,
+            fg_color="transparent",
+            hover_color="#2D2D3D",
+            text_color="#4CAF50",
+            anchor="w",
+            font=ctk.CTkFont(size=12),
+            command=self._apply_suggestion
+        )
+
+        self.duplicate_label = ctk.CTkLabel(
+            form_frame,
+            text="",
+            font=ctk.CTkFont(size=12),
+            text_color="#FFB344",
+            justify="left",
+            wraplength=420
+        )
 
         # Стоимость
         price_label = ctk.CTkLabel(
             form_frame,
-            text="💰 Стоимость (₽ в месяц):",
+            text="💰 Стоимость (в месяц):",
             font=ctk.CTkFont(size=14, weight="bold")
         )
         price_label.pack(anchor="w", padx=20, pady=(20, 5))
@@ -365,6 +903,16 @@ class AddSubscriptionDialog(ctk.CTkToplevel):
         )
         self.price_entry.pack(fill="x", padx=20)
 
+        self.currency_selector = ctk.CTkSegmentedButton(
+            form_frame,
+            values=[f"{CURRENCY_SYMBOLS[c]} {c}" for c in CURRENCY_SYMBOLS],
+            selected_color="#4CAF50",
+            selected_hover_color="#45A049",
+            command=self._select_currency
+        )
+        self.currency_selector.pack(anchor="w", padx=20, pady=(8, 0))
+        self._select_currency_code(BASE_CURRENCY)
+
         # День списания
         day_label = ctk.CTkLabel(
             form_frame,
@@ -524,6 +1072,13 @@ class AddSubscriptionDialog(ctk.CTkToplevel):
             else:
                 btn.configure(fg_color="#2D2D3D", border_width=0)
 
+    def _select_currency(self, value):
+        self.selected_currency = value.split()[-1]
+
+    def _select_currency_code(self, currency):
+        self.selected_currency = currency
+        self.currency_selector.set(f"{CURRENCY_SYMBOLS.get(currency, currency)} {currency}")
+
     def _select_color(self, color):
         self.selected_color = color
         for c, btn in self.color_buttons:
@@ -532,6 +1087,40 @@ class AddSubscriptionDialog(ctk.CTkToplevel):
             else:
                 btn.configure(border_width=0)
 
+    @classmethod
+    def preset_index(cls) -> NameIndex:
+        if cls._preset_index is None:
+            cls._preset_index = NameIndex()
+            for name in cls.PRESETS:
+                cls._preset_index.add(name, name)
+        return cls._preset_index
+
+    def _on_name_changed(self, event=None):
+        name = self.name_entry.get().strip()
+
+        # Предупреждение о дубликате относится только к тому названию, для которого показано
+        if self.confirmed_duplicate is not None and name != self.confirmed_duplicate:
+            self.confirmed_duplicate = None
+            self.duplicate_label.pack_forget()
+            self.name_entry.configure(border_width=0)
+
+        preset = self.preset_index().best(name, PRESET_THRESHOLD) if name else None
+
+        if preset is None or preset == name:
+            self.suggested_preset = None
+            self.suggestion_btn.pack_forget()
+            return
+
+        self.suggested_preset = preset
+        self.suggestion_btn.configure(
+            text=f"💡 Это {self.PRESETS[preset]['icon']} {preset}? Нажмите, чтобы заполнить"
+        )
+        self.suggestion_btn.pack(fill="x", padx=20, pady=(5, 0), after=self.name_entry)
+
+    def _apply_suggestion(self):
+        if self.suggested_preset:
+            self._apply_preset(self.suggested_preset, self.PRESETS[self.suggested_preset])
+
     def _apply_preset(self, name, data):
         self.name_entry.delete(0, "end")
         self.name_entry.insert(0, name)
@@ -539,10 +1128,12 @@ class AddSubscriptionDialog(ctk.CTkToplevel):
         self.category_entry.insert(0, data["category"])
         self._select_icon(data["icon"])
         self._select_color(data["color"])
+        self._on_name_changed()
 
     def _fill_data(self, sub: Subscription):
         self.name_entry.insert(0, sub.name)
-        self.price_entry.insert(0, str(int(sub.price)))
+        self.price_entry.insert(0, format_input_number(sub.price))
+        self._select_currency_code(sub.currency)
         self.day_slider.set(sub.billing_day)
         self._update_day_label(sub.billing_day)
         self.category_entry.insert(0, sub.category)
@@ -562,6 +1153,20 @@ class AddSubscriptionDialog(ctk.CTkToplevel):
 
         self.name_entry.configure(border_width=0)
 
+        # Похожая подписка уже есть — сохраняем только после повторного нажатия
+        if self.find_duplicate and name != self.confirmed_duplicate:
+            duplicate = self.find_duplicate(name, self.subscription.id if self.subscription else None)
+            if duplicate is not None:
+                self.confirmed_duplicate = name
+                self.duplicate_label.configure(
+                    text=f"⚠️ Похоже, «{duplicate.name}» уже есть в списке. "
+                         f"Нажмите «Сохранить» ещё раз, чтобы всё равно сохранить."
+                )
+                self.duplicate_label.pack(anchor="w", padx=20, pady=(5, 0), after=self.name_entry)
+                self.name_entry.configure(border_color="#FFB344", border_width=2)
+                self.name_entry.focus()
+                return
+
         if not price_str:
             self.price_entry.configure(border_color="#FF4444", border_width=2)
             self.price_entry.focus()
@@ -585,7 +1190,8 @@ class AddSubscriptionDialog(ctk.CTkToplevel):
             "billing_day": int(self.day_slider.get()),
             "category": category,
             "color": self.selected_color,
-            "icon": self.selected_icon
+            "icon": self.selected_icon,
+            "currency": self.selected_currency
         }
 
         if self.on_save:
@@ -594,6 +1200,323 @@ class AddSubscriptionDialog(ctk.CTkToplevel):
         self.destroy()
 
 
+class RatesDialog(ctk.CTkToplevel):
+    """Диалог редактирования курсов валют"""
+
+    def __init__(self, parent, rates: dict, on_save=None):
+        super().__init__(parent)
+
+        self.on_save = on_save
+        self.entries = {}
+
+        self.title("💱 Курсы валют")
+        self.geometry("380x320")
+        self.resizable(False, False)
+        self.configure(fg_color="#121218")
+
+        self.grab_set()
+        self.focus_force()
+
+        ctk.CTkLabel(
+            self,
+            text="💱 Курсы валют",
+            font=ctk.CTkFont(size=20, weight="bold")
+        ).pack(anchor="w", padx=20, pady=(20, 10))
+
+        form_frame = ctk.CTkFrame(self, fg_color="#1E1E2E", corner_radius=15)
+        form_frame.pack(fill="x", padx=20, pady=10)
+
+        base_symbol = CURRENCY_SYMBOLS[BASE_CURRENCY]
+        for currency in CURRENCY_SYMBOLS:
+            if currency == BASE_CURRENCY:
+                continue
+
+            row = ctk.CTkFrame(form_frame, fg_color="transparent")
+            row.pack(fill="x", padx=20, pady=8)
+
+            ctk.CTkLabel(
+                row,
+                text=f"1 {CURRENCY_SYMBOLS[currency]} {currency} =",
+                font=ctk.CTkFont(size=14, weight="bold"),
+                width=110,
+                anchor="w"
+            ).pack(side="left")
+
+            entry = ctk.CTkEntry(row, width=120, height=38, font=ctk.CTkFont(size=14), corner_radius=10)
+            entry.insert(0, format_input_number(rates.get(currency, DEFAULT_RATES[currency])))
+            entry.pack(side="left", padx=10)
+            self.entries[currency] = entry
+
+            ctk.CTkLabel(row, text=base_symbol, font=ctk.CTkFont(size=14)).pack(side="left")
+
+        buttons_frame = ctk.CTkFrame(self, fg_color="transparent")
+        buttons_frame.pack(fill="x", padx=20, pady=15)
+
+        ctk.CTkButton(
+            buttons_frame,
+            text="✕ Отмена",
+            width=120,
+            height=40,
+            fg_color="#2D2D3D",
+            hover_color="#3D3D4D",
+            font=ctk.CTkFont(size=14),
+            command=self.destroy
+        ).pack(side="left")
+
+        ctk.CTkButton(
+            buttons_frame,
+            text="💾 Сохранить",
+            width=140,
+            height=40,
+            fg_color="#4CAF50",
+            hover_color="#45A049",
+            font=ctk.CTkFont(size=14, weight="bold"),
+            command=self._save
+        ).pack(side="right")
+
+    def _save(self):
+        rates = {}
+        for currency, entry in self.entries.items():
+            try:
+                rate = float(entry.get().strip())
+                if not math.isfinite(rate) or rate <= 0:
+                    raise ValueError
+            except ValueError:
+                entry.configure(border_color="#FF4444", border_width=2)
+                entry.focus()
+                return
+            entry.configure(border_width=0)
+            rates[currency] = rate
+
+        if self.on_save:
+            self.on_save(rates)
+
+        self.destroy()
+
+
+class ChartsWindow(ctk.CTkToplevel):
+    """Окно аналитики расходов.
+
+    Каждая вкладка рисуется на своём холсте один раз для текущей версии данных.
+    Нарисованный кадр и есть кэш: при переключении вкладок он просто показывается,
+    при изменении размера окна масштабируется, а перерисовка происходит
+    только после изменения данных.
+    """
+
+    TAB_TREND = "📈 Динамика"
+    TAB_CATEGORIES = "🥧 Категории"
+    TAB_CALENDAR = "📅 Календарь"
+
+    PALETTE = AddSubscriptionDialog.COLORS
+    WEEKDAYS = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
+
+    def __init__(self, parent):
+        super().__init__(parent)
+
+        self.app = parent
+
+        self.title("📊 Аналитика расходов")
+        self.geometry("700x560")
+        self.minsize(500, 400)
+        self.configure(fg_color="#121218")
+
+        self.renderers = {
+            self.TAB_TREND: (self._draw_trend, False),
+            self.TAB_CATEGORIES: (self._draw_categories, True),
+            self.TAB_CALENDAR: (self._draw_calendar, False),
+        }
+
+        # Вкладка -> (ключ кадра, исходные ширина и высота, текущий масштаб по x и y)
+        self.frames = {}
+        self.canvases = {}
+
+        self.tabview = ctk.CTkTabview(
+            self,
+            fg_color="#1E1E2E",
+            segmented_button_selected_color="#4CAF50",
+            segmented_button_selected_hover_color="#45A049",
+            command=self.redraw
+        )
+        self.tabview.pack(fill="both", expand=True, padx=15, pady=15)
+
+        for tab in self.renderers:
+            canvas = tk.Canvas(self.tabview.add(tab), bg="#1E1E2E", highlightthickness=0)
+            canvas.pack(fill="both", expand=True)
+            canvas.bind("<Configure>", lambda e, t=tab: self._on_resize(t, e.width, e.height))
+            self.canvases[tab] = canvas
+
+    def redraw(self):
+        """Показать активную вкладку, перерисовав её только при устаревших данных"""
+        tab = self.tabview.get()
+        canvas = self.canvases[tab]
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            return
+
+        frame = self.frames.get(tab)
+        if frame is not None and frame[0] == self._frame_key():
+            return
+
+        draw, _ = self.renderers[tab]
+        canvas.delete("all")
+        draw(canvas, self.app.aggregates(), width, height)
+        self.frames[tab] = (self._frame_key(), width, height, 1.0, 1.0)
+
+    def _frame_key(self):
+        # Календарь и отметка «сегодня» зависят от даты, а не только от данных
+        return self.app.data_version, date.today()
+
+    def _on_resize(self, tab, width, height):
+        frame = self.frames.get(tab)
+        if frame is None or frame[0] != self._frame_key():
+            if tab == self.tabview.get():
+                self.redraw()
+            return
+
+        # Данные не менялись — масштабируем готовый кадр вместо перерисовки
+        key, base_w, base_h, cur_x, cur_y = frame
+        scale_x, scale_y = width / base_w, height / base_h
+        if self.renderers[tab][1]:
+            scale_x = scale_y = min(scale_x, scale_y)
+        self.canvases[tab].scale("all", 0, 0, scale_x / cur_x, scale_y / cur_y)
+        self.frames[tab] = (key, base_w, base_h, scale_x, scale_y)
+
+    @staticmethod
+    def _blend(color_from, color_to, t):
+        """Промежуточный цвет между двумя #RRGGBB"""
+        a = [int(color_from[i:i + 2], 16) for i in (1, 3, 5)]
+        b = [int(color_to[i:i + 2], 16) for i in (1, 3, 5)]
+        return "#" + "".join(f"{round(x + (y - x) * t):02X}" for x, y in zip(a, b))
+
+    def _draw_empty(self, canvas, width, height):
+        canvas.create_text(
+            width / 2, height / 2,
+            text="Пока нет данных",
+            fill="#888888",
+            font=("Arial", 16, "bold")
+        )
+
+    def _draw_trend(self, canvas, agg, width, height):
+        months = agg["trend"]
+        if not months:
+            self._draw_empty(canvas, width, height)
+            return
+
+        pad_left, pad_right, pad_top, pad_bottom = 30, 20, 40, 40
+        plot_w = width - pad_left - pad_right
+        plot_h = height - pad_top - pad_bottom
+        peak = max(value for _, value in months) or 1
+        slot = plot_w / len(months)
+
+        canvas.create_line(
+            pad_left, height - pad_bottom, width - pad_right, height - pad_bottom,
+            fill="#3D3D4D"
+        )
+
+        for i, (month, value) in enumerate(months):
+            x0 = pad_left + i * slot + slot * 0.15
+            x1 = pad_left + (i + 1) * slot - slot * 0.15
+            y1 = height - pad_bottom
+            y0 = y1 - plot_h * value / peak
+            canvas.create_rectangle(x0, y0, x1, y1, fill="#4CAF50", outline="")
+            canvas.create_text(
+                (x0 + x1) / 2, y0 - 10,
+                text=f"{value:,.0f}",
+                fill="white",
+                font=("Arial", 9)
+            )
+            canvas.create_text(
+                (x0 + x1) / 2, y1 + 15,
+                text=f"{month[5:]}.{month[2:4]}",
+                fill="#888888",
+                font=("Arial", 9)
+            )
+
+    def _draw_categories(self, canvas, agg, width, height):
+        categories = sorted(agg["by_category"].items(), key=lambda x: -x[1])
+        total = sum(value for _, value in categories)
+        if not total:
+            self._draw_empty(canvas, width, height)
+            return
+
+        size = min(width * 0.55, height) - 40
+        x0, y0 = 20, (height - size) / 2
+        legend_x = x0 + size + 30
+
+        start = 90.0
+        for i, (category, value) in enumerate(categories):
+            color = self.PALETTE[i % len(self.PALETTE)]
+            extent = 360.0 * value / total
+            if extent >= 360.0:
+                canvas.create_oval(x0, y0, x0 + size, y0 + size, fill=color, outline="")
+            else:
+                canvas.create_arc(
+                    x0, y0, x0 + size, y0 + size,
+                    start=start, extent=-extent,
+                    fill=color, outline="#1E1E2E", style=tk.PIESLICE
+                )
+            start -= extent
+
+            y = y0 + 10 + i * 26
+            canvas.create_rectangle(legend_x, y, legend_x + 14, y + 14, fill=color, outline="")
+            canvas.create_text(
+                legend_x + 22, y + 7,
+                text=f"{category} — {value:,.0f} ({value / total:.0%})",
+                anchor="w",
+                fill="white",
+                font=("Arial", 11)
+            )
+
+    def _draw_calendar(self, canvas, agg, width, height):
+        start = agg["today"]
+        payments = agg["calendar"]
+        peak = max(payments.values(), default=0) or 1
+
+        # Сетка начинается с понедельника текущей недели
+        offset = start.weekday()
+        rows = (offset + CALENDAR_DAYS + 6) // 7
+        pad_top = 30
+        cell_w = (width - 20) / 7
+        cell_h = (height - pad_top - 10) / rows
+
+        for col, name in enumerate(self.WEEKDAYS):
+            canvas.create_text(
+                10 + col * cell_w + cell_w / 2, pad_top / 2,
+                text=name,
+                fill="#888888",
+                font=("Arial", 10)
+            )
+
+        for cell in range(rows * 7):
+            day_index = cell - offset
+            x0 = 10 + (cell % 7) * cell_w
+            y0 = pad_top + (cell // 7) * cell_h
+            if not 0 <= day_index < CALENDAR_DAYS:
+                fill = "#16161F"
+            else:
+                amount = payments.get(day_index, 0)
+                fill = self._blend("#2D2D3D", "#FF4444", amount / peak) if amount else "#2D2D3D"
+
+            canvas.create_rectangle(x0 + 2, y0 + 2, x0 + cell_w - 2, y0 + cell_h - 2, fill=fill, outline="")
+
+            if 0 <= day_index < CALENDAR_DAYS:
+                day = start + timedelta(days=day_index)
+                canvas.create_text(
+                    x0 + 8, y0 + 10,
+                    text=str(day.day),
+                    anchor="w",
+                    fill="white" if day_index else "#4CAF50",
+                    font=("Arial", 9, "bold")
+                )
+                if payments.get(day_index):
+                    canvas.create_text(
+                        x0 + cell_w / 2, y0 + cell_h / 2 + 6,
+                        text=f"{payments[day_index]:,.0f}",
+                        fill="white",
+                        font=("Arial", 10, "bold")
+                    )
+
+
 class SubscriptionTracker(ctk.CTk):
     """Главное окно приложения"""
 
@@ -614,10 +1537,59 @@ class SubscriptionTracker(ctk.CTk):
         self.subscriptions = []
         self.next_id = 1
 
+        # Отображаемые карточки: id -> карточка
+        self.cards = {}
+        self.empty_frame = None
+        self.total_price = 0.0
+        # Триграммный индекс названий для поиска дубликатов
+        self.name_index = NameIndex()
+        # Курсы валют; total_price хранится в валюте отображения
+        self.converter = CurrencyConverter()
+
+        # Отсортированные индексы для каждого порядка списка; карточки идут в порядке активного
+        self.sort_indices = {
+            "⏰ Срочность": SortedIndex(lambda s: s.days_until_payment()),
+            "💰 Цена": SortedIndex(lambda s: s.price * self.converter.rates.get(s.currency, 1.0)),
+            "🔤 Название": SortedIndex(lambda s: s.name.casefold()),
+            "🏷️ Категория": SortedIndex(lambda s: (s.category.casefold(), s.name.casefold())),
+        }
+        self.sort_by = "⏰ Срочность"
+        self.sort_descending = False
+        # День, на который посчитаны ключи срочности и надписи «До оплаты» на карточках
+        self._index_day = date.today()
+
+        # Версия данных растёт при каждом изменении; по ней кэшируются агрегаты и графики
+        self.data_version = 0
+        self._aggregates_cache = None
+        self.charts_window = None
+        # Итог месяца по месяцам "ГГГГ-ММ" для графика динамики
+        self.monthly_history = {}
+
+        # Последнее известное содержимое файла данных {id: запись} и его отпечаток
+        self._disk_state = {}
+        self._disk_signature = None
+        self._watch_interval = WATCH_MIN_INTERVAL
+
+        # История: каждый шаг — список пар (было, стало); None означает отсутствие подписки.
+        # Подписки не изменяются на месте, поэтому шаги ссылаются на общие объекты без копирования
+        self.undo_stack = deque(maxlen=HISTORY_LIMIT)
+        self.redo_stack = []
+
+        # Сообщения о проблемах при загрузке, которые покажем после открытия окна
+        self.load_warnings = []
+        # Файл данных новее приложения: показываем его, но не перезаписываем
+        self.read_only = False
+
+        self._load_rates()
         self._load_data()
         self._create_widgets()
         self._refresh_list()
 
+        if self.load_warnings:
+            self.after(300, self._show_load_warnings)
+
+        self.after(self._watch_interval, self._watch_data_file)
+
     def _create_widgets(self):
         # ============ ВЕРХНЯЯ ПАНЕЛЬ ============
         header_frame = ctk.CTkFrame(self, fg_color="#1E1E2E", corner_radius=0)
@@ -661,6 +1633,32 @@ class SubscriptionTracker(ctk.CTk):
         )
         add_btn.pack(side="right")
 
+        charts_btn = ctk.CTkButton(
+            top_container,
+            text="📊",
+            width=55,
+            height=55,
+            font=ctk.CTkFont(size=20),
+            fg_color="#2D2D3D",
+            hover_color="#3D3D4D",
+            corner_radius=15,
+            command=self._open_charts
+        )
+        charts_btn.pack(side="right", padx=10)
+
+        import_btn = ctk.CTkButton(
+            top_container,
+            text="📥",
+            width=55,
+            height=55,
+            font=ctk.CTkFont(size=20),
+            fg_color="#2D2D3D",
+            hover_color="#3D3D4D",
+            corner_radius=15,
+            command=self._import_subscriptions
+        )
+        import_btn.pack(side="right")
+
         # ============ СТАТИСТИКА ============
         stats_frame = ctk.CTkFrame(header_frame, fg_color="transparent")
         stats_frame.pack(fill="x", padx=30, pady=(0, 20))
@@ -706,6 +1704,88 @@ class SubscriptionTracker(ctk.CTk):
             font=ctk.CTkFont(size=16, weight="bold")
         ).pack(side="left")
 
+        sort_menu = ctk.CTkOptionMenu(
+            list_header,
+            values=list(self.sort_indices),
+            width=140,
+            height=30,
+            fg_color="#2D2D3D",
+            button_color="#3D3D4D",
+            button_hover_color="#4D4D5D",
+            command=self._set_sort
+        )
+        sort_menu.set(self.sort_by)
+        sort_menu.pack(side="left", padx=(15, 5))
+
+        self.sort_direction_btn = ctk.CTkButton(
+            list_header,
+            text="↑",
+            width=30,
+            height=30,
+            fg_color="#2D2D3D",
+            hover_color="#3D3D4D",
+            corner_radius=8,
+            command=self._toggle_sort_direction
+        )
+        self.sort_direction_btn.pack(side="left")
+
+        self.redo_btn = ctk.CTkButton(
+            list_header,
+            text="↪️",
+            width=35,
+            height=30,
+            fg_color="#2D2D3D",
+            hover_color="#3D3D4D",
+            corner_radius=8,
+            state="disabled",
+            command=self._redo
+        )
+        self.redo_btn.pack(side="right", padx=(5, 0))
+
+        self.undo_btn = ctk.CTkButton(
+            list_header,
+            text="↩️",
+            width=35,
+            height=30,
+            fg_color="#2D2D3D",
+            hover_color="#3D3D4D",
+            corner_radius=8,
+            state="disabled",
+            command=self._undo
+        )
+        self.undo_btn.pack(side="right")
+
+        rates_btn = ctk.CTkButton(
+            list_header,
+            text="💱",
+            width=35,
+            height=30,
+            fg_color="#2D2D3D",
+            hover_color="#3D3D4D",
+            corner_radius=8,
+            command=self._edit_rates
+        )
+        rates_btn.pack(side="right", padx=(0, 15))
+
+        self.currency_menu = ctk.CTkOptionMenu(
+            list_header,
+            values=list(CURRENCY_SYMBOLS),
+            width=80,
+            height=30,
+            fg_color="#2D2D3D",
+            button_color="#3D3D4D",
+            button_hover_color="#4D4D5D",
+            command=self._set_display_currency
+        )
+        self.currency_menu.set(self.converter.display)
+        self.currency_menu.pack(side="right", padx=5)
+
+        # Горячие клавиши (в том числе для русской раскладки)
+        for sequence in ("<Control-z>", "<Control-Cyrillic_ya>"):
+            self.bind(sequence, lambda e: self._undo())
+        for sequence in ("<Control-y>", "<Control-Z>", "<Control-Cyrillic_en>", "<Control-Cyrillic_YA>"):
+            self.bind(sequence, lambda e: self._redo())
+
         self.scroll_frame = ctk.CTkScrollableFrame(
             self,
             fg_color="transparent",
@@ -719,59 +1799,252 @@ class SubscriptionTracker(ctk.CTk):
         for widget in self.scroll_frame.winfo_children():
             widget.destroy()
 
+        self.cards = {}
+        self.empty_frame = None
+        self.total_price = sum(self.converter.convert_all(self.subscriptions).values())
+
+        self._index_day = date.today()
+        for index in self.sort_indices.values():
+            index.rebuild(self.subscriptions)
+
+        self.name_index = NameIndex()
+        for sub in self.subscriptions:
+            self.name_index.add(sub.id, sub.name)
+
         if not self.subscriptions:
-            # Пустое состояние
-            empty_frame = ctk.CTkFrame(self.scroll_frame, fg_color="#1E1E2E", corner_radius=15)
-            empty_frame.pack(fill="x", pady=30, padx=30)
+            self._show_empty_state()
+        else:
+            by_id = {s.id: s for s in self.subscriptions}
+            for sub_id in self.sort_indices[self.sort_by].ids(self.sort_descending):
+                self._insert_card(by_id[sub_id])
 
-            ctk.CTkLabel(
-                empty_frame,
-                text="📭",
-                font=ctk.CTkFont(size=50)
-            ).pack(pady=(30, 10))
+        # Обновление статистики
+        self._update_stats()
+        self._data_changed()
 
-            ctk.CTkLabel(
-                empty_frame,
-                text="Пока нет подписок",
-                font=ctk.CTkFont(size=20, weight="bold")
-            ).pack()
+    def _show_empty_state(self):
+        # Пустое состояние
+        self.empty_frame = ctk.CTkFrame(self.scroll_frame, fg_color="#1E1E2E", corner_radius=15)
+        self.empty_frame.pack(fill="x", pady=30, padx=30)
 
-            ctk.CTkLabel(
-                empty_frame,
-                text="Нажмите кнопку «➕ Добавить подписку» выше,\nчтобы начать отслеживать свои расходы",
-                font=ctk.CTkFont(size=14),
-                text_color="#888888",
-                justify="center"
-            ).pack(pady=(10, 30))
+        ctk.CTkLabel(
+            self.empty_frame,
+            text="📭",
+            font=ctk.CTkFont(size=50)
+        ).pack(pady=(30, 10))
 
+        ctk.CTkLabel(
+            self.empty_frame,
+            text="Пока нет подписок",
+            font=ctk.CTkFont(size=20, weight="bold")
+        ).pack()
+
+        ctk.CTkLabel(
+            self.empty_frame,
+            text="Нажмите кнопку «➕ Добавить подписку» выше,\nчтобы начать отслеживать свои расходы",
+            font=ctk.CTkFont(size=14),
+            text_color="#888888",
+            justify="center"
+        ).pack(pady=(10, 30))
+
+    def _insert_card(self, sub: Subscription):
+        """Вставить карточку на её место в активном порядке, не перестраивая список"""
+        card = SubscriptionCard(
+            self.scroll_frame,
+            sub,
+            on_edit=self._edit_subscription,
+            on_delete=self._delete_subscription
+        )
+
+        # Соседняя карточка, которая должна идти сразу после новой
+        items = self.sort_indices[self.sort_by].items
+        pos = self.sort_indices[self.sort_by].position(sub.id)
+        if self.sort_descending:
+            neighbours = (items[i][1] for i in range(pos - 1, -1, -1))
         else:
-            # Сортировка по дням до оплаты (срочные сверху)
-            sorted_subs = sorted(self.subscriptions, key=lambda x: x.days_until_payment())
-
-            for sub in sorted_subs:
-                card = SubscriptionCard(
-                    self.scroll_frame,
-                    sub,
-                    on_edit=self._edit_subscription,
-                    on_delete=self._delete_subscription
-                )
-                card.pack(fill="x", pady=6, padx=5)
+            neighbours = (items[i][1] for i in range(pos + 1, len(items)))
+        following = next((self.cards[i] for i in neighbours if i in self.cards), None)
 
-        # Обновление статистики
+        if following is not None:
+            card.pack(fill="x", pady=6, padx=5, before=following)
+        else:
+            card.pack(fill="x", pady=6, padx=5)
+
+        self.cards[sub.id] = card
+
+    def _remove_card(self, sub_id: int):
+        card = self.cards.pop(sub_id, None)
+        if card is not None:
+            card.destroy()
+
+    def _index_add(self, sub: Subscription):
+        for index in self.sort_indices.values():
+            index.add(sub)
+        self.name_index.add(sub.id, sub.name)
+
+    def _index_remove(self, sub_id: int):
+        for index in self.sort_indices.values():
+            index.remove(sub_id)
+        self.name_index.remove(sub_id)
+
+    def _set_sort(self, sort_by):
+        self.sort_by = sort_by
+        self._apply_sort()
+
+    def _toggle_sort_direction(self):
+        self.sort_descending = not self.sort_descending
+        self.sort_direction_btn.configure(text="↓" if self.sort_descending else "↑")
+        self._apply_sort()
+
+    def _check_new_day(self) -> bool:
+        """С наступлением нового дня пересобрать список: ключи срочности устарели"""
+        if date.today() == self._index_day:
+            return False
+        self._refresh_list()
+        return True
+
+    def _apply_sort(self):
+        """Переставить карточки в порядке уже отсортированного индекса"""
+        if self._check_new_day():
+            return
+        order = self.sort_indices[self.sort_by].ids(self.sort_descending)
+        for sub_id in order:
+            self.cards[sub_id].pack_forget()
+        for sub_id in order:
+            self.cards[sub_id].pack(fill="x", pady=6, padx=5)
+
+    def _apply_changes(self, added=(), updated=(), removed=()):
+        """Точечно применить изменения к данным, карточкам и статистике"""
+        self._check_new_day()
+
+        removed = set(removed)
+        if removed:
+            for s in self.subscriptions:
+                if s.id in removed:
+                    self.total_price -= self.converter.convert(s)
+                    self.converter.forget(s.id)
+            self.subscriptions = [s for s in self.subscriptions if s.id not in removed]
+            for sub_id in removed:
+                self._remove_card(sub_id)
+                self._index_remove(sub_id)
+
+        if updated:
+            by_id = {s.id: s for s in updated}
+            for i, s in enumerate(self.subscriptions):
+                new = by_id.get(s.id)
+                if new is not None:
+                    old_price = self.converter.convert(s)
+                    self.total_price += self.converter.convert(new) - old_price
+                    self.subscriptions[i] = new
+                    self._remove_card(s.id)
+                    self._index_remove(s.id)
+                    self._index_add(new)
+                    self._insert_card(new)
+
+        for sub in added:
+            self.subscriptions.append(sub)
+            self.total_price += self.converter.convert(sub)
+            self._index_add(sub)
+            self._insert_card(sub)
+
+        # Погрешность округления накопленной суммы не должна давать «-0» в пустом списке
+        if not self.subscriptions:
+            self.total_price = 0.0
+
+        # Пустое состояние показываем только при пустом списке
+        if self.subscriptions and self.empty_frame is not None:
+            self.empty_frame.destroy()
+            self.empty_frame = None
+        elif not self.subscriptions and self.empty_frame is None:
+            self._show_empty_state()
+
+        self._update_stats()
+        self._data_changed()
+
+    def _data_changed(self):
+        self.data_version += 1
+        if self.charts_window is not None and self.charts_window.winfo_exists():
+            self.charts_window.redraw()
+
+    def aggregates(self):
+        """Агрегаты для графиков, пересчитываемые только после изменения данных"""
+        today = date.today()
+        cache = self._aggregates_cache
+        if cache is None or cache[0] != self.data_version or cache[1]["today"] != today:
+            prices = self.converter.convert_all(self.subscriptions)
+            agg = compute_aggregates(self.subscriptions, today, prices)
+            # История хранится в базовой валюте
+            history = dict(self.monthly_history)
+            history[today.strftime("%Y-%m")] = self.converter.to_base(self.total_price)
+            agg["trend"] = [
+                (month, self.converter.from_base(total))
+                for month, total in sorted(history.items())[-TREND_MONTHS:]
+            ]
+            cache = self._aggregates_cache = (self.data_version, agg)
+        return cache[1]
+
+    def _recalculate_totals(self):
+        """Пересчитать итог одним проходом после смены курсов или валюты отображения"""
+        self.total_price = sum(self.converter.convert_all(self.subscriptions).values())
         self._update_stats()
+        self._data_changed()
+
+    def _set_display_currency(self, currency):
+        self.converter.set_display(currency)
+        self._save_rates()
+        self._recalculate_totals()
+
+    def _edit_rates(self):
+        dialog = RatesDialog(self, self.converter.rates, on_save=self._set_rates)
+        dialog.focus()
+
+    def _set_rates(self, rates):
+        self.converter.set_rates(rates)
+        self._save_rates()
+        # Ключи сортировки по цене зависят от курсов
+        self.sort_indices["💰 Цена"].rebuild(self.subscriptions)
+        if self.sort_by == "💰 Цена":
+            self._apply_sort()
+        self._recalculate_totals()
+
+    def _load_rates(self):
+        if os.path.exists(RATES_FILE):
+            try:
+                with open(RATES_FILE, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                    self.converter = CurrencyConverter(data.get("rates"), data.get("display", BASE_CURRENCY))
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"Ошибка загрузки курсов: {e}")
+
+    def _save_rates(self):
+        data = {
+            "base": BASE_CURRENCY,
+            "display": self.converter.display,
+            "rates": self.converter.rates
+        }
+        try:
+            with open(RATES_FILE, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f"Ошибка сохранения курсов: {e}")
+
+    def _open_charts(self):
+        if self.charts_window is None or not self.charts_window.winfo_exists():
+            self.charts_window = ChartsWindow(self)
+        self.charts_window.focus()
 
     def _update_stats(self):
-        total = sum(s.price for s in self.subscriptions)
+        total = self.total_price
         yearly = total * 12
         count = len(self.subscriptions)
+        symbol = CURRENCY_SYMBOLS[self.converter.display]
 
-        self.total_label.configure(text=f"💰 Ты тратишь: {total:,.0f} ₽/мес")
+        self.total_label.configure(text=f"💰 Ты тратишь: {total:,.0f} {symbol}/мес")
         self.count_label.configure(text=str(count))
-        self.yearly_label.configure(text=f"{yearly:,.0f} ₽")
+        self.yearly_label.configure(text=f"{yearly:,.0f} {symbol}")
 
         if self.subscriptions:
-            nearest = min(self.subscriptions, key=lambda x: x.days_until_payment())
-            days = nearest.days_until_payment()
+            days = min(s.days_until_payment() for s in self.subscriptions)
 
             if days <= 3:
                 color = "#FF4444"
@@ -785,14 +2058,19 @@ class SubscriptionTracker(ctk.CTk):
             self.next_payment_label.configure(text="—", text_color="white")
 
     def _add_subscription(self):
-        dialog = AddSubscriptionDialog(self, on_save=self._save_subscription)
+        dialog = AddSubscriptionDialog(
+            self,
+            on_save=self._save_subscription,
+            find_duplicate=self._find_duplicate
+        )
         dialog.focus()
 
     def _edit_subscription(self, subscription: Subscription):
         dialog = AddSubscriptionDialog(
             self,
             subscription=subscription,
-            on_save=self._save_subscription
+            on_save=self._save_subscription,
+            find_duplicate=self._find_duplicate
         )
         dialog.focus()
 
@@ -801,48 +2079,521 @@ class SubscriptionTracker(ctk.CTk):
             # Новая подписка
             data["id"] = self.next_id
             self.next_id += 1
-            sub = Subscription(**data)
-            self.subscriptions.append(sub)
+            self._commit([(None, Subscription(**data))])
         else:
             # Редактирование существующей
-            for i, s in enumerate(self.subscriptions):
-                if s.id == data["id"]:
-                    self.subscriptions[i] = Subscription(**data)
-                    break
-
-        self._save_data()
-        self._refresh_list()
+            old = next((s for s in self.subscriptions if s.id == data["id"]), None)
+            if old is not None:
+                self._commit([(old, Subscription(**data))])
 
     def _delete_subscription(self, sub_id: int):
-        self.subscriptions = [s for s in self.subscriptions if s.id != sub_id]
+        old = next((s for s in self.subscriptions if s.id == sub_id), None)
+        if old is not None:
+            self._commit([(old, None)])
+
+    def _find_duplicate(self, name: str, exclude_id=None):
+        """Подписка с похожим названием или None"""
+        sub_id = self.name_index.best(name, DUPLICATE_THRESHOLD, exclude=exclude_id)
+        return next((s for s in self.subscriptions if s.id == sub_id), None) if sub_id is not None else None
+
+    def _import_subscriptions(self):
+        """Импорт подписок из другого файла в формате subscriptions.json одним шагом истории"""
+        path = filedialog.askopenfilename(
+            parent=self,
+            title="📥 Импорт подписок",
+            filetypes=[("JSON", "*.json"), ("Все файлы", "*.*")]
+        )
+        if not path:
+            return
+
+        try:
+            loaded = load_data_file(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Импорт", f"Не удалось прочитать файл:\n{e}", parent=self)
+            return
+
+        if loaded.quarantined:
+            messagebox.showwarning(
+                "Импорт",
+                f"Пропущено некорректных записей: {len(loaded.quarantined)}\n"
+                + "\n".join(f"• {reason}" for _, reason in loaded.quarantined[:10]),
+                parent=self
+            )
+
+        incoming = []
+        duplicates = []
+        # Сверяем и с уже имеющимися подписками, и с ранее принятыми из этого же файла
+        batch_index = NameIndex()
+        for sub in loaded.subscriptions:
+            existing = self._find_duplicate(sub.name)
+            in_batch = batch_index.best(sub.name, DUPLICATE_THRESHOLD)
+            if existing is not None or in_batch is not None:
+                duplicates.append((sub, existing.name if existing else incoming[in_batch].name))
+            else:
+                batch_index.add(len(incoming), sub.name)
+            incoming.append(sub)
+
+        if not incoming:
+            messagebox.showinfo("Импорт", "В файле нет подписок.", parent=self)
+            return
+
+        if duplicates:
+            listing = "\n".join(f"• {sub.name} ≈ {other}" for sub, other in duplicates[:15])
+            if len(duplicates) > 15:
+                listing += f"\n… и ещё {len(duplicates) - 15}"
+            answer = messagebox.askyesnocancel(
+                "Импорт",
+                f"Похоже на дубликаты ({len(duplicates)}):\n{listing}\n\n"
+                f"Пропустить их? «Нет» — импортировать всё.",
+                parent=self
+            )
+            if answer is None:
+                return
+            if answer:
+                skipped = {id(sub) for sub, _ in duplicates}
+                incoming = [sub for sub in incoming if id(sub) not in skipped]
+
+        changes = []
+        for sub in incoming:
+            changes.append((None, replace(sub, id=self.next_id)))
+            self.next_id += 1
+        if changes:
+            self._commit(changes)
+
+    def _commit(self, changes):
+        """Выполнить шаг (список пар было/стало) и записать его в историю"""
+        self._report_skipped(self._apply_pairs(changes))
+        self.undo_stack.append(changes)
+        self.redo_stack.clear()
+        self._update_history_buttons()
+
+    def _undo(self):
+        if not self.undo_stack:
+            return
+        changes = self.undo_stack.pop()
+        self._report_skipped(self._apply_pairs([(after, before) for before, after in reversed(changes)]))
+        self.redo_stack.append(changes)
+        self._update_history_buttons()
+
+    def _redo(self):
+        if not self.redo_stack:
+            return
+        changes = self.redo_stack.pop()
+        self._report_skipped(self._apply_pairs(changes))
+        self.undo_stack.append(changes)
+        self._update_history_buttons()
+
+    def _apply_pairs(self, changes) -> int:
+        """Применить пары (было, стало) через точечное обновление и сохранить.
+
+        Пары сверяются с текущими id: с момента записи шага другой процесс мог
+        удалить подписку или вернуть её. Возвращение уже существующего id
+        становится заменой, а изменение или удаление отсутствующего пропускается.
+        Возвращает число пропущенных пар.
+        """
+        live = {s.id for s in self.subscriptions}
+        added, updated, removed = [], [], []
+        skipped = 0
+
+        for before, after in changes:
+            if after is None:
+                if before.id in live:
+                    removed.append(before.id)
+                    live.discard(before.id)
+                else:
+                    skipped += 1
+            elif after.id not in live:
+                if before is None:
+                    added.append(after)
+                    live.add(after.id)
+                else:
+                    skipped += 1
+            else:
+                updated.append(after)
+
+        self._apply_changes(added=added, updated=updated, removed=removed)
         self._save_data()
-        self._refresh_list()
+        return skipped
+
+    def _report_skipped(self, skipped: int):
+        if skipped:
+            messagebox.showwarning(
+                "История",
+                f"Не применено изменений: {skipped}. "
+                f"Эти подписки уже удалены или изменены в другом окне.",
+                parent=self
+            )
+
+    def _rebase_history(self, old: Subscription, new: Subscription):
+        """Заменить в истории ссылки на подписку, получившую новый id"""
+        for stack in (self.undo_stack, self.redo_stack):
+            for step in stack:
+                for k, (before, after) in enumerate(step):
+                    step[k] = (new if before is old else before, new if after is old else after)
+
+    def _update_history_buttons(self):
+        self.undo_btn.configure(state="normal" if self.undo_stack else "disabled")
+        self.redo_btn.configure(state="normal" if self.redo_stack else "disabled")
 
     def _save_data(self):
-        data = {
-            "next_id": self.next_id,
-            "subscriptions": [asdict(s) for s in self.subscriptions]
-        }
+        if self.read_only:
+            print("Сохранение отключено: файл данных создан более новой версией приложения")
+            return
         try:
-            with open(DATA_FILE, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with file_lock(LOCK_FILE):
+                if file_signature(DATA_FILE) not in (None, self._disk_signature):
+                    # Файл изменён другим процессом — сначала подтягиваем его правки,
+                    # иначе запись ниже их молча затрёт
+                    self._merge_external_changes()
+                    if self.read_only:
+                        return
+
+                self.monthly_history[date.today().strftime("%Y-%m")] = round(
+                    self.converter.to_base(self.total_price), 2
+                )
+                data = {
+                    "version": SCHEMA_VERSION,
+                    "next_id": self.next_id,
+                    "subscriptions": [asdict(s) for s in self.subscriptions],
+                    "history": self.monthly_history
+                }
+                tmp_file = DATA_FILE + ".tmp"
+                with open(tmp_file, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_file, DATA_FILE)
+
+                self._disk_state = {s["id"]: s for s in data["subscriptions"]}
+                self._disk_signature = file_signature(DATA_FILE)
         except Exception as e:
             print(f"Ошибка сохранения: {e}")
 
     def _load_data(self):
-        if os.path.exists(DATA_FILE):
-            try:
-                with open(DATA_FILE, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.next_id = data.get("next_id", 1)
-                    self.subscriptions = [
-                        Subscription(**s) for s in data.get("subscriptions", [])
-                    ]
-            except (json.JSONDecodeError, KeyError, TypeError) as e:
-                print(f"Ошибка загрузки данных: {e}")
-                self.subscriptions = []
+        if not os.path.exists(DATA_FILE):
+            return
+
+        signature = file_signature(DATA_FILE)
+        try:
+            loaded = load_data_file(DATA_FILE)
+        except SchemaVersionError as e:
+            self._enter_read_only(e)
+            self._disk_signature = signature
+            return
+        except (OSError, ValueError) as e:
+            # Файл не читается целиком — сохраняем копию, прежде чем его перезапишет _save_data
+            print(f"Ошибка загрузки данных: {e}")
+            backup = self._backup_data_file()
+            self.load_warnings.append(
+                f"Файл данных повреждён и не был загружен ({e}).\nКопия сохранена: {backup}"
+            )
+            self._disk_signature = signature
+            return
+
+        self.subscriptions = loaded.subscriptions
+        self.next_id = loaded.next_id
+        self.monthly_history = loaded.history
+        self._disk_state = {s.id: asdict(s) for s in self.subscriptions}
+        self._disk_signature = signature
+        self._quarantine(loaded.quarantined)
+
+    def _quarantine(self, quarantined):
+        if not quarantined:
+            return
+        try:
+            quarantine_records(quarantined)
+        except OSError as e:
+            print(f"Ошибка сохранения отбракованных записей: {e}")
+        reasons = "\n".join(f"• {reason}" for _, reason in quarantined[:10])
+        if len(quarantined) > 10:
+            reasons += f"\n… и ещё {len(quarantined) - 10}"
+        self.load_warnings.append(
+            f"Не удалось загрузить записей: {len(quarantined)}. "
+            f"Они сохранены в {QUARANTINE_FILE}:\n{reasons}"
+        )
+
+    def _enter_read_only(self, error):
+        """Перестать сохранять данные, чтобы не понизить версию чужого файла"""
+        print(f"Ошибка загрузки данных: {error}")
+        if self.read_only:
+            # Уже предупредили и сохранили копию — не повторяем на каждом изменении файла
+            return
+        self.read_only = True
+        backup = self._backup_data_file()
+        self.load_warnings.append(
+            f"Данные не загружены: {error}.\n"
+            "Обновите приложение. До этого изменения не будут сохраняться.\n"
+            f"Копия файла: {backup}"
+        )
+
+    def _backup_data_file(self):
+        backup = f"{DATA_FILE}.broken-{datetime.now():%Y%m%d-%H%M%S}"
+        try:
+            shutil.copy2(DATA_FILE, backup)
+        except OSError as e:
+            print(f"Ошибка резервного копирования: {e}")
+        return backup
+
+    def _show_load_warnings(self):
+        warnings, self.load_warnings = self.load_warnings, []
+        if warnings:
+            messagebox.showwarning("Загрузка данных", "\n\n".join(warnings), parent=self)
+
+    def _watch_data_file(self):
+        """Опрос файла данных: подхватить изменения, сделанные другими процессами"""
+        try:
+            # Тот же таймер следит за сменой дня, пока приложение открыто
+            self._check_new_day()
+
+            signature = file_signature(DATA_FILE)
+
+            if signature is None or signature == self._disk_signature:
+                # Изменений нет — опрашиваем всё реже
+                self._watch_interval = min(self._watch_interval * 2, WATCH_MAX_INTERVAL)
+            else:
+                with file_lock(LOCK_FILE, blocking=False) as locked:
+                    # Если файл сейчас пишет другой процесс, повторим на следующем тике
+                    if locked:
+                        self._merge_external_changes()
+                self._watch_interval = WATCH_MIN_INTERVAL
+        except OSError as e:
+            # Например, lock-файл нельзя создать в папке только для чтения — пробуем реже
+            print(f"Ошибка проверки файла данных: {e}")
+            self._watch_interval = min(self._watch_interval * 2, WATCH_MAX_INTERVAL)
+        finally:
+            # Опрос не должен останавливаться из-за ошибки в одном тике
+            self.after(self._watch_interval, self._watch_data_file)
+
+    def _merge_external_changes(self):
+        """Перечитать изменённый файл и применить отличия от последнего известного состояния.
+
+        Вызывается под блокировкой. Записи, изменённые локально и ещё не сохранённые,
+        остаются локальными: их версию запишет ближайший _save_data.
+        """
+        signature = file_signature(DATA_FILE)
+        try:
+            loaded = load_data_file(DATA_FILE)
+        except SchemaVersionError as e:
+            self._enter_read_only(e)
+            self._disk_signature = signature
+            self.after_idle(self._show_load_warnings)
+            return
+        except (OSError, ValueError) as e:
+            # Не перечитываем тот же испорченный файл на каждом тике; копия спасёт чужие данные
+            print(f"Ошибка чтения изменённого файла: {e}")
+            self._backup_data_file()
+            self._disk_signature = signature
+            return
+
+        records = {s.id: asdict(s) for s in loaded.subscriptions}
+        self._quarantine(loaded.quarantined)
+        if self.load_warnings:
+            self.after_idle(self._show_load_warnings)
+
+        local = {s.id: s for s in self.subscriptions}
+        pending = {
+            i for i in local.keys() | self._disk_state.keys()
+            if i not in local or i not in self._disk_state
+            or asdict(local[i]) != self._disk_state[i]
+        }
+
+        self.next_id = max(self.next_id, loaded.next_id)
+        for month, total in loaded.history.items():
+            self.monthly_history.setdefault(month, total)
+
+        added, changed, removed = diff_records(self._disk_state, records)
+        to_add, to_update, to_remove = [], [], []
+
+        for rec in added:
+            if rec["id"] in local:
+                # Id занят новой локальной подпиской — переносим её на свободный id
+                moved = replace(local[rec["id"]], id=self.next_id)
+                self.next_id += 1
+                self._rebase_history(local[rec["id"]], moved)
+                to_remove.append(rec["id"])
+                to_add.append(moved)
+                to_add.append(Subscription(**rec))
+            elif rec["id"] not in pending:
+                to_add.append(Subscription(**rec))
+        for rec in changed:
+            if rec["id"] not in pending:
+                to_update.append(Subscription(**rec))
+        for sub_id in removed:
+            if sub_id not in pending:
+                to_remove.append(sub_id)
+
+        self._disk_state = records
+        self._disk_signature = signature
+
+        if to_add or to_update or to_remove:
+            self._apply_changes(added=to_add, updated=to_update, removed=to_remove)
+
+
+def summarize_file(path: str, days: int, rates: dict, currency: str) -> dict:
+    """Сводка по одному файлу данных (выполняется в отдельном процессе)"""
+    try:
+        loaded = load_data_file(path)
+    except (OSError, ValueError) as e:
+        return {"file": path, "error": str(e)}
+    subscriptions = loaded.subscriptions
+
+    converter = CurrencyConverter(rates, currency)
+    factors = {c: converter.factor(c) for c in {s.currency for s in subscriptions}}
+    today = date.today()
+
+    monthly = 0.0
+    by_category = {}
+    due_count = 0
+    due_amount = 0.0
+    for s in subscriptions:
+        price = s.price * factors[s.currency]
+        monthly += price
+        by_category[s.category] = by_category.get(s.category, 0) + price
+        for _ in s.payment_dates(today, days + 1):
+            due_count += 1
+            due_amount += price
+
+    return {
+        "file": path,
+        "subscriptions": len(subscriptions),
+        "invalid": len(loaded.quarantined),
+        "monthly": monthly,
+        "yearly": monthly * 12,
+        "due_count": due_count,
+        "due_amount": due_amount,
+        "by_category": by_category,
+    }
+
+
+def combine_summaries(summaries) -> dict:
+    """Общий итог по всем успешно прочитанным файлам"""
+    total = {
+        "file": "ИТОГО",
+        "subscriptions": 0,
+        "invalid": 0,
+        "monthly": 0.0,
+        "yearly": 0.0,
+        "due_count": 0,
+        "due_amount": 0.0,
+        "by_category": {},
+    }
+    for summary in summaries:
+        if "error" in summary:
+            continue
+        for key in ("subscriptions", "invalid", "monthly", "yearly", "due_count", "due_amount"):
+            total[key] += summary[key]
+        for category, amount in summary["by_category"].items():
+            total["by_category"][category] = total["by_category"].get(category, 0) + amount
+    return total
+
+
+def write_report(summaries, total, fmt: str, currency: str, out):
+    def rounded(summary):
+        result = dict(summary)
+        for key in ("monthly", "yearly", "due_amount"):
+            if key in result:
+                result[key] = round(result[key], 2)
+        if "by_category" in result:
+            result["by_category"] = {c: round(v, 2) for c, v in result["by_category"].items()}
+        return result
+
+    if fmt == "json":
+        json.dump(
+            {
+                "currency": currency,
+                "files": [rounded(s) for s in summaries],
+                "total": rounded(total),
+            },
+            out,
+            ensure_ascii=False,
+            indent=2
+        )
+        out.write("\n")
+        return
+
+    categories = sorted(total["by_category"])
+    writer = csv.writer(out)
+    writer.writerow(
+        ["file", "subscriptions", "invalid", "monthly", "yearly", "due_count", "due_amount", "error"]
+        + [f"category:{c}" for c in categories]
+    )
+    for summary in [*summaries, total]:
+        summary = rounded(summary)
+        by_category = summary.get("by_category", {})
+        writer.writerow(
+            [summary["file"]]
+            + [
+                summary.get(key, "")
+                for key in ("subscriptions", "invalid", "monthly", "yearly", "due_count", "due_amount")
+            ]
+            + [summary.get("error", "")]
+            + [by_category.get(c, "") for c in categories]
+        )
+
+
+def run_report(argv) -> int:
+    """Консольный отчёт по множеству файлов данных без запуска интерфейса"""
+    parser = argparse.ArgumentParser(
+        prog="Subscription_Tracker.py report",
+        description="Сводка расходов по файлам в формате subscriptions.json"
+    )
+    parser.add_argument("paths", nargs="+", help="файлы данных или папки с *.json")
+    parser.add_argument("--days", type=int, default=7, help="окно ближайших платежей в днях (по умолчанию 7)")
+    parser.add_argument("--format", choices=("csv", "json"), default="csv", help="формат вывода")
+    parser.add_argument("--currency", choices=list(CURRENCY_SYMBOLS), help="валюта отчёта")
+    parser.add_argument("--rates", default=RATES_FILE, help=f"файл курсов (по умолчанию {RATES_FILE})")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="число процессов")
+    parser.add_argument("-o", "--output", help="файл отчёта (по умолчанию стандартный вывод)")
+    args = parser.parse_args(argv)
+    if args.days < 0:
+        parser.error("--days не может быть отрицательным")
+
+    paths = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            paths.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.endswith(".json") and name not in (RATES_FILE, QUARANTINE_FILE)
+            ))
+        else:
+            paths.append(path)
+
+    rates, currency = {}, BASE_CURRENCY
+    if os.path.exists(args.rates):
+        try:
+            with open(args.rates, "r", encoding="utf-8") as f:
+                data = json.load(f)
+                rates = clean_rates(data.get("rates"))
+                currency = clean_display_currency(data.get("display"))
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"Ошибка загрузки курсов: {e}", file=sys.stderr)
+    currency = args.currency or currency
+
+    jobs = max(1, args.jobs or 1)
+    worker = partial(summarize_file, days=args.days, rates=rates, currency=currency)
+    if jobs == 1 or len(paths) == 1:
+        summaries = [worker(path) for path in paths]
+    else:
+        # Крупные порции снижают накладные расходы на передачу задач между процессами
+        chunksize = max(1, len(paths) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            summaries = list(executor.map(worker, paths, chunksize=chunksize))
+
+    total = combine_summaries(summaries)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            write_report(summaries, total, args.format, currency, out)
+    else:
+        write_report(summaries, total, args.format, currency, sys.stdout)
+
+    errors = [s for s in summaries if "error" in s]
+    for summary in errors:
+        print(f"Ошибка чтения {summary['file']}: {summary['error']}", file=sys.stderr)
+    return 1 if errors else 0
 
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["report"]:
+        sys.exit(run_report(sys.argv[2:]))
+
     app = SubscriptionTracker()
-    app.mainloop()
\ No newline at end of file
+    app.mainloop()